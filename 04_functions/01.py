@@ -389,18 +389,36 @@ print(f"Theme: {processed['settings']['theme']}")
 
 # Example 5: Memoization with Closures
 def memoize(func):
-    """Create a memoized version of a function using closure."""
+    """Create a memoized, thread-safe version of a function using closure."""
+    import threading
+
     cache = {}
+    key_locks = {}
+    locks_guard = threading.Lock()
 
     def memoized_func(*args):
         if args in cache:
             print(f"  Cache hit for {args}")
             return cache[args]
 
-        print(f"  Computing for {args}")
-        result = func(*args)
-        cache[args] = result
-        return result
+        # Per-key lock: concurrent callers for the same args share one call
+        with locks_guard:
+            key_lock = key_locks.setdefault(args, threading.RLock())
+
+        try:
+            with key_lock:
+                if args in cache:
+                    print(f"  Cache hit for {args}")
+                    return cache[args]
+
+                print(f"  Computing for {args}")
+                result = func(*args)
+                cache[args] = result
+                return result
+        finally:
+            # Published or failed; either way the lock can go
+            with locks_guard:
+                key_locks.pop(args, None)
 
     memoized_func.cache = cache
     memoized_func.clear_cache = lambda: cache.clear()
@@ -469,9 +487,9 @@ def timer(func):
     import time
 
     def wrapper(*args, **kwargs):
-        start = time.time()
+        start = time.perf_counter()  # Monotonic, unlike time.time()
         result = func(*args, **kwargs)
-        end = time.time()
+        end = time.perf_counter()
         print(f"⏱️ {func.__name__} took {end - start:.4f} seconds")
         return result
 
@@ -2,9 +2,9 @@ import time
 
 def timer(func):
     def wrapper(*args, **kwargs):
-        start = time.time()
+        start = time.perf_counter()  # Monotonic, unlike time.time()
         result = func(*args, **kwargs)
-        end = time.time()
+        end = time.perf_counter()
         print(f"{func.__name__} ran in {end - start} time")
         return result
 
@@ -1,7 +1,21 @@
+import itertools
+import reprlib
+
+DEBUG_ENABLED = True
+SAMPLE_EVERY = 1  # Log only every Nth call
+
+
 def debug(func):
+    counter = itertools.count()  # next() is atomic, so threads can share it
+
     def wrapper(*args, **kwargs):
-        args_value = ", ".join(str(arg) for arg in args)
-        kwargs_value = ", ".join(f"{k}={v}" for k, v in kwargs.items())
+        # Fast path: skip all formatting when disabled or not sampled
+        if not DEBUG_ENABLED or next(counter) % SAMPLE_EVERY:
+            return func(*args, **kwargs)
+
+        # reprlib truncates huge arguments instead of rendering them fully
+        args_value = ", ".join(reprlib.repr(arg) for arg in args)
+        kwargs_value = ", ".join(f"{k}={reprlib.repr(v)}" for k, v in kwargs.items())
         print(
             f"calling: {func.__name__} with args {args_value} and kwargs {kwargs_value}"
         )
@@ -1,18 +1,35 @@
 import time
+import threading
 
 
 def cache(func):
     cache_value = {}
+    key_locks = {}
+    locks_guard = threading.Lock()
     print(cache_value)
 
     def wrapper(*args):
         if args in cache_value:
             print("Value from cache")
             return cache_value[args]
-        result = func(*args)
-        cache_value[args] = result
-        print("value from directly func execution")
-        return result
+
+        # One lock per key: concurrent misses wait for the first caller
+        with locks_guard:
+            key_lock = key_locks.setdefault(args, threading.Lock())
+
+        try:
+            with key_lock:
+                if args in cache_value:
+                    print("Value from cache")
+                    return cache_value[args]
+                result = func(*args)
+                cache_value[args] = result
+                print("value from directly func execution")
+                return result
+        finally:
+            # Published or failed; either way the lock can go
+            with locks_guard:
+                key_locks.pop(args, None)
 
     return wrapper
 
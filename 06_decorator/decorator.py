@@ -8,7 +8,17 @@ implementations for common software engineering challenges.
 """
 
 import time
+import asyncio
 import functools
+import inspect
+import itertools
+import logging
+import random
+import reprlib
+import threading
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 print("Python Decorators: Comprehensive Implementation")
@@ -18,84 +28,488 @@ print("=" * 60)
 print("\nCore Decorator Implementations")
 
 
-def timer(func):
+class LatencyHistogram:
     """
-    Measure and display function execution time.
+    HDR-style log-linear histogram of nanosecond samples.
+
+    Values below 32 get exact buckets; above that every power of two is
+    split into 16 linear sub-buckets, giving ~6% relative precision with a
+    fixed ~1000-slot list. Recording is an index calculation plus one list
+    increment, and count/mean/percentiles are derived from the buckets at
+    snapshot time. Increments are not locked, so concurrent threads may
+    occasionally drop a sample, an accepted trade-off for metrics.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (61 << 4)
+
+    def record(self, value):
+        """Record one sample in nanoseconds."""
+        if value < 32:
+            self.counts[value] += 1
+        else:
+            shift = value.bit_length() - 5
+            self.counts[(shift << 4) + (value >> shift)] += 1
+
+    @staticmethod
+    def bucket_bounds(index):
+        """Return the (lowest, highest) value that falls into bucket index."""
+        if index < 32:
+            return index, index
+        shift = (index >> 4) - 1
+        low = (index - (shift << 4)) << shift
+        return low, low + (1 << shift) - 1
+
+    def percentile(self, percent, total=None):
+        """Return the highest value equivalent to the given percentile."""
+        total = total if total is not None else sum(self.counts)
+        if not total:
+            return 0
+        threshold = total * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= threshold:
+                return self.bucket_bounds(index)[1]
+        return 0
+
+    def snapshot(self):
+        """Return count, mean, max and p50/p99/p999 in nanoseconds."""
+        total = sum(self.counts)
+        used = [(index, count) for index, count in enumerate(self.counts) if count]
+        weighted = sum(sum(self.bucket_bounds(i)) / 2 * count for i, count in used)
+        return {
+            "count": total,
+            "mean": weighted / total if total else 0,
+            "p50": self.percentile(50, total),
+            "p99": self.percentile(99, total),
+            "p999": self.percentile(99.9, total),
+            "max": self.bucket_bounds(used[-1][0])[1] if used else 0,
+        }
+
+
+class MetricsRegistry:
+    """Named collection of latency histograms, one per timed function."""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def histogram(self, name):
+        """Return the histogram for name, creating it on first use."""
+        return self.histograms.setdefault(name, LatencyHistogram())
+
+    def snapshot(self):
+        """Return a snapshot of every histogram keyed by name."""
+        return {name: hist.snapshot() for name, hist in self.histograms.items()}
+
+    def export(self, sink=print):
+        """Write one summary line per histogram to sink (microseconds)."""
+        for name, stats in self.snapshot().items():
+            sink(
+                f"📈 {name}: count={stats['count']} "
+                f"p50={stats['p50'] / 1e3:.1f}µs p99={stats['p99'] / 1e3:.1f}µs "
+                f"p999={stats['p999'] / 1e3:.1f}µs max={stats['max'] / 1e3:.1f}µs"
+            )
+
+
+metrics = MetricsRegistry()
+
+
+def print_timing(name, elapsed_ns):
+    """Timer sink that prints every call, like the classic timer."""
+    print(f"⏱️  {name} executed in {elapsed_ns / 1e9:.4f} seconds")
+
+
+def timer(func=None, *, registry=None, sink=None):
+    """
+    Record function execution time in a latency histogram.
+
+    Samples come from the monotonic time.perf_counter_ns clock and land in
+    a per-function histogram of the registry, named module.qualname so
+    same-named functions in different modules stay apart. Printing on every call is
+    opt-in through a sink such as print_timing.
 
     Args:
         func: The function to be timed
+        registry (MetricsRegistry): Where to record samples (module default)
+        sink: Optional callable(name, elapsed_ns) invoked after each call
 
     Returns:
-        Wrapped function that prints execution time
+        Wrapped function that records execution time
     """
 
-    def wrapper(*args, **kwargs):
-        start = time.time()
-        result = func(*args, **kwargs)
-        end = time.time()
-        print(f"⏱️  {func.__name__} executed in {end - start:.4f} seconds")
-        return result
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        record = (registry or metrics).histogram(name).record
+        clock = time.perf_counter_ns
 
-    return wrapper
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            result = func(*args, **kwargs)
+            elapsed = clock() - start
+            record(elapsed)
+            if sink is not None:
+                sink(func.__name__, elapsed)
+            return result
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+class CallRecord:
+    """
+    Structured record of one decorated call event, formatted lazily.
+
+    Arguments and results are stored as references; nothing is turned
+    into text until a sink actually writes the record, and long values
+    are truncated with reprlib so huge payloads never get fully rendered.
+    """
+
+    __slots__ = ("event", "func_name", "args", "kwargs", "result", "timestamp")
+
+    short = reprlib.Repr()
+    short.maxstring = 60
+    short.maxother = 60
+
+    def __init__(self, event, func_name, args=(), kwargs=None, result=None):
+        self.event = event
+        self.func_name = func_name
+        self.args = args
+        self.kwargs = kwargs
+        self.result = result
+        self.timestamp = time.time()
+
+    def __str__(self):
+        if self.event == "call":
+            parts = [self.short.repr(arg) for arg in self.args]
+            parts += [f"{k}={self.short.repr(v)}" for k, v in (self.kwargs or {}).items()]
+            return f"🔍 Calling: {self.func_name}({', '.join(parts)})"
+        if self.event == "return":
+            return f"🔍 Returned: {self.short.repr(self.result)}"
 
+        stamp = datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        if self.event == "start":
+            return f"📝 [{stamp}] Executing {self.func_name}"
+        return f"📝 [{stamp}] {self.func_name} completed"
 
-def debug(func):
+
+class CallLogSink:
+    """
+    Level-gated destination for CallRecord objects.
+
+    The writer receives the record itself, so a writer that stores records
+    never pays for formatting, while ``print`` formats on output only.
+    """
+
+    def __init__(self, level=logging.DEBUG, writer=print):
+        self.level = level
+        self.writer = writer
+
+    def emit(self, record):
+        self.writer(record)
+
+
+call_log = CallLogSink()
+
+
+def debug(func=None, *, sink=None, sample_every=1):
     """
     Log function calls with arguments and return values.
 
+    Records go to a level-gated sink at DEBUG level. When the sink is above
+    DEBUG, or the call is not one of the sampled 1-in-N, the wrapper calls
+    straight through without building any record.
+
     Args:
         func: The function to be debugged
+        sink (CallLogSink): Destination for records (module call_log)
+        sample_every (int): Log only every Nth call
 
     Returns:
         Wrapped function that logs call details
     """
 
-    def wrapper(*args, **kwargs):
-        args_value = ", ".join(str(arg) for arg in args)
-        kwargs_value = ", ".join(f"{k}={v}" for k, v in kwargs.items())
-        all_args = ", ".join(filter(None, [args_value, kwargs_value]))
-        print(f"🔍 Calling: {func.__name__}({all_args})")
-        result = func(*args, **kwargs)
-        print(f"🔍 Returned: {result}")
-        return result
+    def decorator(func):
+        counter = itertools.count()
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            log = sink or call_log
+            if log.level > logging.DEBUG or next(counter) % sample_every:
+                return func(*args, **kwargs)
+
+            log.emit(CallRecord("call", name, args, kwargs))
+            result = func(*args, **kwargs)
+            log.emit(CallRecord("return", name, result=result))
+            return result
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
-    return wrapper
 
+_MISSING = object()
 
-def cache(func):
+
+def _make_key(args, kwargs):
     """
-    Cache function results to avoid redundant computations.
+    Build a hashable cache key from call arguments.
+
+    Args:
+        args (tuple): Positional arguments of the call
+        kwargs (dict): Keyword arguments of the call
+
+    Returns:
+        The args tuple itself, or args plus sorted keyword items
+    """
+    if not kwargs:
+        return args
+    return args + (_MISSING,) + tuple(sorted(kwargs.items()))
+
+
+class LRUCache:
+    """
+    Bounded cache with least-recently-used eviction and per-entry TTL.
+
+    Entries live in an OrderedDict, so lookup, insert and eviction are O(1).
+    Expired entries are dropped lazily when they are looked up. Hits take
+    no lock: each OrderedDict operation is atomic under the GIL, and an
+    entry evicted mid-lookup is simply treated as a miss. Only set() locks,
+    so a concurrent insert cannot evict twice. Counters are not locked and
+    may occasionally drop an increment, an accepted trade-off for metrics.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None, record=True):
+        """
+        Return the cached value for key, or default on a miss.
+
+        With record=False the lookup leaves the hit/miss counters alone,
+        for re-checks of a miss that was already counted.
+        """
+        entry = self.data.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                try:
+                    self.data.move_to_end(key)
+                except KeyError:
+                    pass  # Evicted by another thread; the value is still valid
+                if record:
+                    self.hits += 1
+                return value
+            self.data.pop(key, None)
+
+        if record:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """Store value under key, evicting the oldest entry when full."""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.data[key] = (value, expires_at)
+            self.data.move_to_end(key)
+
+            if self.maxsize is not None and len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.data),
+        }
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class KeyedLocks:
+    """
+    Hand out one lock per key so callers for unrelated keys never contend.
+
+    Locks are reference-counted and dropped once no caller holds or waits
+    on them, so memory stays proportional to the keys in flight.
+    """
+
+    def __init__(self):
+        self.locks = {}
+        self.guard = threading.Lock()
+
+    def acquire(self, key):
+        """Block until the lock for key is held; return its entry."""
+        with self.guard:
+            entry = self.locks.get(key)
+            if entry is None:
+                entry = self.locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+        return entry
+
+    def release(self, key, entry):
+        """Release the lock for key and forget it when nobody else waits."""
+        entry[0].release()
+        with self.guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.locks[key]
+
+
+def cache(func=None, *, maxsize=128, ttl=None, verbose=True, single_flight=False):
+    """
+    Cache function results in a bounded LRU cache with optional TTL.
+
+    Usable both as ``@cache`` and ``@cache(maxsize=..., ttl=...)``.
+    Coroutine functions get an async wrapper that caches awaited results.
+    The arguments form the key and stay referenced until evicted, including
+    ``self`` on a method, so give each instance its own cache instead of
+    decorating methods.
 
     Args:
         func: The function whose results should be cached
+        maxsize (int): Maximum number of cached results (None for unbounded)
+        ttl (float): Seconds each result stays valid (None for no expiry)
+        verbose (bool): Print a line on every hit and miss
+        single_flight (bool): Let concurrent misses for one key share a
+            single computation instead of each running the function
 
     Returns:
         Wrapped function with caching capability
     """
-    cache_value = {}
 
-    def wrapper(*args, **kwargs):
-        # Create cache key from arguments
-        key = str(args) + str(sorted(kwargs.items()))
+    def decorator(func):
+        cache_value = LRUCache(maxsize=maxsize, ttl=ttl)
+        if inspect.iscoroutinefunction(func):
+            return _async_cache_wrapper(func, cache_value, verbose)
 
-        if key in cache_value:
-            print(f"💾 Cache hit for {func.__name__}")
-            return cache_value[key]
+        key_locks = KeyedLocks()
 
-        result = func(*args, **kwargs)
-        cache_value[key] = result
-        print(f"🔄 Computing {func.__name__}")
-        return result
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+
+            result = cache_value.get(key, _MISSING)
+            if result is not _MISSING:
+                if verbose:
+                    print(f"💾 Cache hit for {func.__name__}")
+                return result
+
+            if not single_flight:
+                result = func(*args, **kwargs)
+                cache_value.set(key, result)
+                if verbose:
+                    print(f"🔄 Computing {func.__name__}")
+                return result
+
+            # Only the first caller computes; the rest wait on the key lock
+            # and pick up the stored result once it is released.
+            entry = key_locks.acquire(key)
+            try:
+                result = cache_value.get(key, _MISSING, record=False)
+                if result is not _MISSING:
+                    if verbose:
+                        print(f"💾 Cache hit for {func.__name__} (shared)")
+                    return result
+
+                result = func(*args, **kwargs)
+                cache_value.set(key, result)
+                if verbose:
+                    print(f"🔄 Computing {func.__name__}")
+                return result
+            finally:
+                key_locks.release(key, entry)
+
+        # Expose cache and its counters for inspection
+        wrapper.cache = cache_value
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _async_cache_wrapper(func, cache_value, verbose):
+    """
+    Build the coroutine wrapper used by cache for async functions.
+
+    The awaited result is cached, never the coroutine object. Concurrent
+    awaiters of a cold key share one pending task, and each awaits it
+    through asyncio.shield so a cancelled caller cannot cancel the others.
+
+    Args:
+        func: The coroutine function whose results should be cached
+        cache_value (LRUCache): Storage for awaited results
+        verbose (bool): Print a line on every hit and miss
+
+    Returns:
+        Coroutine wrapper with caching and in-flight deduplication
+    """
+    pending = {}
+
+    def store_result(key, task):
+        pending.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            cache_value.set(key, task.result())
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = _make_key(args, kwargs)
+
+        result = cache_value.get(key, _MISSING)
+        if result is not _MISSING:
+            if verbose:
+                print(f"💾 Cache hit for {func.__name__}")
+            return result
+
+        task = pending.get(key)
+        if task is None:
+            if verbose:
+                print(f"🔄 Computing {func.__name__}")
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            pending[key] = task
+            task.add_done_callback(functools.partial(store_result, key))
+        elif verbose:
+            print(f"⏳ Awaiting in-flight {func.__name__}")
+
+        return await asyncio.shield(task)
 
-    # Expose cache for inspection
     wrapper.cache = cache_value
+    wrapper.pending = pending
     return wrapper
 
 
 print("Testing core implementations:")
 
 
-@timer
+@timer(sink=print_timing)
 @debug
 def example_function(n):
     """Example function that sleeps for n seconds."""
@@ -117,6 +531,103 @@ print(f"Result: {result}")
 
 print(f"\nFibonacci(10) = {fibonacci(10)}")
 print(f"Fibonacci(10) cached = {fibonacci(10)}")
+print(f"Cache stats: {fibonacci.cache.stats()}")
+
+
+def benchmark_cache_hit(iterations=200_000):
+    """Compare cache-hit cost of string keys against the LRU tuple keys."""
+
+    def string_key_cache(func):
+        cache_value = {}
+
+        def wrapper(*args, **kwargs):
+            key = str(args) + str(sorted(kwargs.items()))
+            if key in cache_value:
+                return cache_value[key]
+            result = func(*args, **kwargs)
+            cache_value[key] = result
+            return result
+
+        return wrapper
+
+    def lookup(user_id, region="eu"):
+        return {"user_id": user_id, "region": region}
+
+    candidates = [
+        ("string keys (unbounded dict)", string_key_cache(lookup)),
+        ("tuple keys (LRUCache)", cache(lookup, maxsize=1024, verbose=False)),
+    ]
+
+    for label, cached in candidates:
+        cached(42, region="us")  # Warm the cache
+        start = time.perf_counter()
+        for _ in range(iterations):
+            cached(42, region="us")
+        per_hit = (time.perf_counter() - start) / iterations * 1e9
+        print(f"   {label}: {per_hit:.0f} ns per hit")
+
+
+print("\nCache hit benchmark:")
+benchmark_cache_hit()
+
+
+# Bounded cache evicts least-recently-used entries
+@cache(maxsize=2, verbose=False)
+def square(n):
+    return n * n
+
+
+for n in (1, 2, 1, 3, 2):
+    square(n)
+print(f"Bounded cache stats: {square.cache.stats()}")
+
+
+def benchmark_single_flight(num_threads=32):
+    """Count underlying invocations when many threads miss the same key."""
+    for single_flight in (False, True):
+        invocations = []
+
+        @cache(verbose=False, single_flight=single_flight)
+        def expensive_lookup(key):
+            invocations.append(key)
+            time.sleep(0.05)  # Simulate slow backend
+            return f"value-for-{key}"
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            list(executor.map(expensive_lookup, ["hot-key"] * num_threads))
+        elapsed = time.perf_counter() - start
+
+        mode = "single-flight" if single_flight else "plain cache  "
+        print(
+            f"   {mode}: {len(invocations)} invocations "
+            f"for {num_threads} threads in {elapsed:.2f}s"
+        )
+
+
+print(f"\nSingle-flight stress test:")
+benchmark_single_flight()
+
+
+async def async_cache_example():
+    """Show that concurrent awaits of one key share a single computation."""
+    calls = []
+
+    @cache(maxsize=256, ttl=30, verbose=False)
+    async def fetch_profile(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.1)  # Simulate upstream round-trip
+        return {"user_id": user_id, "name": f"User-{user_id}"}
+
+    first = await asyncio.gather(*[fetch_profile(101) for _ in range(10)])
+    second = await fetch_profile(101)
+    print(f"   10 concurrent awaits + 1 repeat -> {len(calls)} upstream call(s)")
+    print(f"   Same result object reused: {first[0] is second}")
+    print(f"   Cache stats: {fetch_profile.cache.stats()}")
+
+
+print(f"\nAsync cache example:")
+asyncio.run(async_cache_example())
 
 print("\n" + "=" * 60)
 
@@ -124,6 +635,55 @@ print("\n" + "=" * 60)
 print("\nProduction-Ready Decorator Implementations")
 
 
+# Fusable decorators register their logic here as a stage for fuse():
+# (before_lines, after_lines, bindings). The lines are source equivalent to
+# the wrapper body; before_lines read args/kwargs and may set ``result`` to
+# short-circuit, after_lines run once ``result`` is known. "{i}" in the
+# lines and binding names is replaced by the stage index so names stay
+# unique, and bindings maps those names to the objects the lines use.
+_FUSE_STAGES = weakref.WeakKeyDictionary()
+
+
+def _user_arg(args, kwargs):
+    """Return the user a guarded call is made for, positional or user=..."""
+    if args:
+        return args[0]
+    try:
+        return kwargs["user"]
+    except KeyError:
+        raise TypeError("missing required argument: 'user'") from None
+
+
+def guard_decorator(func, check, inline=None, bindings=None):
+    """
+    Wrap func with a guard check and register it as a fusable stage.
+
+    Args:
+        func: Function being decorated
+        check: Callable(args, kwargs) returning a value to short-circuit
+            with, or _MISSING to let the call through
+        inline: Optional source lines equivalent to check for fuse(); they
+            set ``result`` to short-circuit. Without them the fused
+            wrapper calls check.
+        bindings (dict): Objects the inline lines refer to, by name
+
+    Returns:
+        Wrapped function running check before func
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        result = check(args, kwargs)
+        if result is not _MISSING:
+            return result
+        return func(*args, **kwargs)
+
+    if inline is None:
+        inline, bindings = ["result = check{i}(args, kwargs)"], {"check{i}": check}
+    _FUSE_STAGES[wrapper] = (inline, [], bindings or {})
+    return wrapper
+
+
 def login_required(func):
     """
     Ensure user is authenticated before function execution.
@@ -135,12 +695,17 @@ def login_required(func):
         Wrapped function with authentication check
     """
 
-    def wrapper(user, *args, **kwargs):
-        if not user.get("is_logged_in", False):
+    def check(args, kwargs):
+        if not _user_arg(args, kwargs).get("is_logged_in", False):
             return "Access denied: Authentication required"
-        return func(user, *args, **kwargs)
+        return _MISSING
 
-    return wrapper
+    inline = [
+        "user{i} = args[0] if args else _user_arg(args, kwargs)",
+        'if not user{i}.get("is_logged_in", False):',
+        '    result = "Access denied: Authentication required"',
+    ]
+    return guard_decorator(func, check, inline)
 
 
 def admin_required(func):
@@ -154,98 +719,299 @@ def admin_required(func):
         Wrapped function with authorization check
     """
 
-    def wrapper(user, *args, **kwargs):
-        if not user.get("is_admin", False):
+    def check(args, kwargs):
+        if not _user_arg(args, kwargs).get("is_admin", False):
             return "Access denied: Administrative privileges required"
-        return func(user, *args, **kwargs)
+        return _MISSING
 
-    return wrapper
+    inline = [
+        "user{i} = args[0] if args else _user_arg(args, kwargs)",
+        'if not user{i}.get("is_admin", False):',
+        '    result = "Access denied: Administrative privileges required"',
+    ]
+    return guard_decorator(func, check, inline)
 
 
-def rate_limit(max_calls=3, time_window=60):
+class SlidingWindowLimiter:
+    """
+    Sliding-window rate limiter with amortized O(1) admission per key.
+
+    Each key owns a deque of admission timestamps and its own lock, so
+    callers for different keys never contend and an uncontended admission
+    touches no shared lock. Idle keys are swept once per time window,
+    which keeps memory bounded by the number of recently active keys.
+    clock defaults to time.monotonic; benchmarks pass a synthetic one.
+    """
+
+    def __init__(self, max_calls, time_window, clock=time.monotonic):
+        self.max_calls = max_calls
+        self.time_window = time_window
+        self.clock = clock
+        self.windows = {}
+        self.guard = threading.Lock()
+        self.next_sweep = clock() + time_window
+
+    def allow(self, key=None):
+        """Record a call for key and return False if it exceeds the limit."""
+        now = self.clock()
+        cutoff = now - self.time_window
+
+        while True:
+            window = self.windows.get(key)
+            if window is None:
+                with self.guard:
+                    window = self.windows.setdefault(key, (deque(), threading.Lock()))
+
+            calls, lock = window
+            with lock:
+                # A sweep may have dropped this window while we waited
+                if self.windows.get(key) is not window:
+                    continue
+
+                while calls and calls[0] <= cutoff:
+                    calls.popleft()
+                if len(calls) >= self.max_calls:
+                    return False
+                calls.append(now)
+                break
+
+        if now >= self.next_sweep:
+            self._sweep(now)
+        return True
+
+    def _sweep(self, now):
+        """Forget keys with no calls inside the current window."""
+        cutoff = now - self.time_window
+        with self.guard:
+            self.next_sweep = now + self.time_window
+            for key, (calls, lock) in list(self.windows.items()):
+                with lock:
+                    if not calls or calls[-1] <= cutoff:
+                        del self.windows[key]
+
+
+def rate_limit(max_calls=3, time_window=60, key=None):
     """
     Limit function calls within a specified time window.
 
     Args:
         max_calls (int): Maximum allowed calls within time window
         time_window (int): Time window in seconds
+        key: Optional function of the call arguments returning the key
+            to limit on (e.g. the user name); None shares one limit
 
     Returns:
         Decorator function implementing rate limiting
     """
 
     def decorator(func):
-        calls = []
-
-        def wrapper(*args, **kwargs):
-            now = time.time()
-            # Remove expired calls
-            calls[:] = [
-                call_time for call_time in calls if now - call_time < time_window
-            ]
+        limiter = SlidingWindowLimiter(max_calls, time_window)
 
-            if len(calls) >= max_calls:
+        def check(args, kwargs):
+            limit_key = key(*args, **kwargs) if key is not None else None
+            if not limiter.allow(limit_key):
                 return "Rate limit exceeded: Too many requests"
-
-            calls.append(now)
-            return func(*args, **kwargs)
-
+            return _MISSING
+
+        limit_key = "key{i}(*args, **kwargs)" if key is not None else "None"
+        inline = [
+            f"if not limiter{{i}}.allow({limit_key}):",
+            '    result = "Rate limit exceeded: Too many requests"',
+        ]
+        bindings = {"limiter{i}": limiter, "key{i}": key}
+        wrapper = guard_decorator(func, check, inline, bindings)
+        wrapper.limiter = limiter
         return wrapper
 
     return decorator
 
 
-def retry(max_attempts=3, delay=1):
+class RetryBudget:
     """
-    Retry function execution on failure.
+    Shared allowance that caps retries to a fraction of overall calls.
+
+    Every call deposits ``ratio`` tokens and every retry spends one, so a
+    failing dependency sees at most about ``1 + ratio`` times its normal
+    load instead of ``max_attempts`` times.
+    """
+
+    def __init__(self, ratio=0.1, min_retries=5, capacity=20):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.balance = float(min_retries)
+        self.lock = threading.Lock()
+
+    def record_call(self):
+        """Deposit the retry allowance earned by one call."""
+        with self.lock:
+            self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def try_spend(self):
+        """Withdraw one retry; return False when the budget is exhausted."""
+        with self.lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+def retry(
+    max_attempts=3,
+    delay=1,
+    max_delay=30,
+    backoff=2,
+    jitter=True,
+    deadline=None,
+    retry_on=Exception,
+    budget=None,
+    verbose=True,
+):
+    """
+    Retry function execution on failure with exponential backoff.
 
     Args:
         max_attempts (int): Maximum retry attempts
-        delay (int): Delay between attempts in seconds
+        delay (float): Base delay before the first retry in seconds
+        max_delay (float): Upper bound for a single backoff sleep
+        backoff (float): Multiplier applied to the delay after each attempt
+        jitter (bool): Sleep a random time in [0, backoff delay] (full jitter)
+        deadline (float): Give up once this many seconds have passed
+        retry_on: Exception type(s), or a predicate taking the exception
+        budget (RetryBudget): Shared budget limiting retries across calls
+        verbose (bool): Print a line for each failed attempt
 
     Returns:
         Decorator function implementing retry logic
     """
+    if isinstance(retry_on, (type, tuple)):
+        exc_types = retry_on
+        should_retry = lambda exc: isinstance(exc, exc_types)
+    else:
+        should_retry = retry_on
 
     def decorator(func):
+        def next_delay(attempt, exc, started):
+            """Return seconds to wait before the next attempt, or None to stop."""
+            if attempt == max_attempts - 1 or not should_retry(exc):
+                return None
+
+            pause = min(max_delay, delay * backoff**attempt)
+            if jitter:
+                pause = random.uniform(0, pause)
+            if deadline is not None and time.monotonic() - started + pause > deadline:
+                return None
+            if budget is not None and not budget.try_spend():
+                return None
+
+            if verbose:
+                print(f"Attempt {attempt + 1} failed: {exc}. Retrying in {pause:.2f}s...")
+            return pause
+
+        def give_up(attempt, exc):
+            if verbose:
+                print(f"Failed after {attempt + 1} attempts: {exc}")
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.monotonic()
+                if budget is not None:
+                    budget.record_call()
+                for attempt in range(max_attempts):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        pause = next_delay(attempt, e, started)
+                        if pause is None:
+                            give_up(attempt, e)
+                            raise
+                        await asyncio.sleep(pause)
+
+            return async_wrapper
+
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            if budget is not None:
+                budget.record_call()
             for attempt in range(max_attempts):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    if attempt == max_attempts - 1:
-                        print(f"Failed after {max_attempts} attempts: {e}")
-                        raise e
-                    print(
-                        f"Attempt {attempt + 1} failed: {e}. "
-                        f"Retrying in {delay}s..."
-                    )
-                    time.sleep(delay)
+                    pause = next_delay(attempt, e, started)
+                    if pause is None:
+                        give_up(attempt, e)
+                        raise
+                    time.sleep(pause)
 
         return wrapper
 
     return decorator
 
 
-def log_calls(func):
+def log_calls(func=None, *, sink=None, sample_every=1):
     """
     Log function calls with timestamps.
 
+    Records go to a level-gated sink at INFO level; the timestamp is taken
+    as a float and only formatted with strftime if the record is written.
+
     Args:
         func: Function to be logged
+        sink (CallLogSink): Destination for records (module call_log)
+        sample_every (int): Log only every Nth call
 
     Returns:
         Wrapped function with call logging
     """
 
-    def wrapper(*args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"📝 [{timestamp}] Executing {func.__name__}")
-        result = func(*args, **kwargs)
-        print(f"📝 [{timestamp}] {func.__name__} completed")
-        return result
+    def decorator(func):
+        counter = itertools.count()
+        name = func.__name__
+
+        def before(args, kwargs):
+            log = sink or call_log
+            if log.level > logging.INFO or next(counter) % sample_every:
+                return None
+            start = CallRecord("start", name)
+            log.emit(start)
+            return start
+
+        def after(start, result):
+            if start is not None:
+                done = CallRecord("done", name)
+                done.timestamp = start.timestamp
+                (sink or call_log).emit(done)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = before(args, kwargs)
+            result = func(*args, **kwargs)
+            after(start, result)
+            return result
+
+        _FUSE_STAGES[wrapper] = (
+            [
+                "log{i} = sink{i} or call_log",
+                "token{i} = None",
+                "if log{i}.level <= logging.INFO and not next(counter{i}) % sample_every{i}:",
+                '    token{i} = CallRecord("start", name{i})',
+                "    log{i}.emit(token{i})",
+            ],
+            [
+                "if token{i} is not None:",
+                '    done{i} = CallRecord("done", name{i})',
+                "    done{i}.timestamp = token{i}.timestamp",
+                "    log{i}.emit(done{i})",
+            ],
+            {"sink{i}": sink, "counter{i}": counter, "sample_every{i}": sample_every, "name{i}": name},
+        )
+        return wrapper
 
-    return wrapper
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 def validate_positive(func):
@@ -259,13 +1025,83 @@ def validate_positive(func):
         Wrapped function with input validation
     """
 
-    def wrapper(*args, **kwargs):
+    def check(args, kwargs):
         for arg in args:
             if isinstance(arg, (int, float)) and arg < 0:
                 return f"Validation error: Negative values not allowed"
-        return func(*args, **kwargs)
+        return _MISSING
 
-    return wrapper
+    inline = [
+        "for arg{i} in args:",
+        "    if isinstance(arg{i}, (int, float)) and arg{i} < 0:",
+        '        result = "Validation error: Negative values not allowed"',
+        "        break",
+    ]
+    return guard_decorator(func, check, inline)
+
+
+def fuse(func):
+    """
+    Fuse a stack of fusable decorators into one generated wrapper.
+
+    Walks the __wrapped__ chain while layers are registered stages
+    (login_required, admin_required, rate_limit, log_calls,
+    validate_positive) and generates a single function with their bodies
+    inlined in the original order, so the stack costs one Python frame
+    instead of one per decorator. What stays a call is the work each stage
+    delegates: the limiter's allow(), a rate_limit key function (which is
+    user code and receives the spread arguments) and the log sink. The
+    first non-fusable layer (or the original function) becomes the inner
+    call. Attributes set on the layers, such as rate_limit's limiter, are
+    kept on the fused function.
+
+    Args:
+        func: A function decorated with fusable decorators
+
+    Returns:
+        Equivalent function with a single wrapper frame
+    """
+    layers = []
+    inner = func
+    while inner in _FUSE_STAGES:
+        layers.append(inner)
+        inner = inner.__wrapped__
+
+    bindings = {"inner": inner}
+    body = ["result = _MISSING"]
+    pending = []  # after_lines still owed, innermost last
+
+    for i, layer in enumerate(layers):
+        before, after, names = _FUSE_STAGES[layer]
+        bindings.update((name.format(i=i), value) for name, value in names.items())
+        body += [line.format(i=i) for line in before]
+        if after:
+            pending.append([line.format(i=i) for line in after])
+        elif before:
+            body.append("if result is not _MISSING:")
+            body += ["    " + line for lines in reversed(pending) for line in lines]
+            body.append("    return result")
+
+    body.append("result = inner(*args, **kwargs)")
+    body += [line for lines in reversed(pending) for line in lines]
+    body.append("return result")
+
+    # The outer function binds stage objects as closure cells; module names
+    # such as call_log and _MISSING resolve through this module's globals.
+    lines = [f"def make({', '.join(bindings)}):", "    def fused(*args, **kwargs):"]
+    lines += ["        " + line for line in body]
+    lines.append("    return fused")
+    source = "\n".join(lines)
+    namespace = {}
+    exec(compile(source, f"<fused {func.__qualname__}>", "exec"), globals(), namespace)
+
+    fused = functools.wraps(func)(namespace["make"](**bindings))
+    for layer in layers:
+        for attr, value in vars(layer).items():
+            if attr != "__wrapped__":
+                fused.__dict__.setdefault(attr, value)
+    fused.fused_source = source
+    return fused
 
 
 print("Configuring production examples...")
@@ -274,7 +1110,7 @@ print("Configuring production examples...")
 
 
 @login_required
-@rate_limit(max_calls=2, time_window=10)
+@rate_limit(max_calls=2, time_window=10, key=lambda user, *args, **kwargs: user["name"])
 @log_calls
 @validate_positive
 def transfer_money(user, amount, to_account):
@@ -301,7 +1137,7 @@ def unreliable_api_call(success_rate=0.3):
         raise Exception("API temporarily unavailable")
 
 
-@cache
+@cache(single_flight=True)
 @timer
 @log_calls
 def process_large_file(filename, operation="read"):
@@ -324,6 +1160,7 @@ print(transfer_money(regular_user, 25, "11111"))  # Rate limited
 
 print(transfer_money(guest_user, 100, "12345"))  # Authentication required
 print(transfer_money(regular_user, -50, "12345"))  # Validation error
+print(transfer_money(admin_user, 75, "22222"))  # Separate per-user limit
 
 print("\n2. Administrative Operations:")
 print(view_all_accounts(admin_user))
@@ -341,6 +1178,202 @@ print(process_large_file("data.txt", "read"))
 print(process_large_file("data.txt", "read"))  # Cached result
 print(process_large_file("config.txt", "write"))
 
+
+def benchmark_rate_limit(iterations=20_000):
+    """Compare admission cost of list rebuilding against the deque limiter.
+
+    Both run in steady state on a synthetic clock that ticks once per call
+    with a window of max_calls ticks: the window stays full, and every
+    call evicts the oldest timestamp and is admitted.
+    """
+
+    def list_rebuild_allow(calls, max_calls, time_window, now):
+        calls[:] = [call_time for call_time in calls if now - call_time < time_window]
+        if len(calls) >= max_calls:
+            return False
+        calls.append(now)
+        return True
+
+    for max_calls in (10, 100, 1_000, 10_000):
+        calls, ticks = [], itertools.count()
+        for _ in range(max_calls):  # Warm up to a full window
+            list_rebuild_allow(calls, max_calls, max_calls, next(ticks))
+        rounds = iterations // 10
+        start = time.perf_counter()
+        admitted = sum(list_rebuild_allow(calls, max_calls, max_calls, next(ticks)) for _ in range(rounds))
+        list_cost = (time.perf_counter() - start) / rounds * 1e9
+        assert admitted == rounds
+
+        ticks = itertools.count()
+        limiter = SlidingWindowLimiter(max_calls, time_window=max_calls, clock=ticks.__next__)
+        for _ in range(max_calls):
+            limiter.allow()
+        start = time.perf_counter()
+        admitted = sum(limiter.allow() for _ in range(iterations))
+        deque_cost = (time.perf_counter() - start) / iterations * 1e9
+        assert admitted == iterations
+
+        print(
+            f"   max_calls={max_calls:>6}: list rebuild {list_cost:>9.0f} ns, "
+            f"deque window {deque_cost:>5.0f} ns per admission"
+        )
+
+
+print("\n5. Rate Limiter Admission Cost:")
+benchmark_rate_limit()
+
+
+def benchmark_retry_budget(num_calls=200, max_attempts=4):
+    """Count upstream attempts against a dead dependency with and without a budget."""
+    for label, budget in (("no budget", None), ("shared budget", RetryBudget(ratio=0.1))):
+        attempts = []
+
+        @retry(max_attempts=max_attempts, delay=0.001, budget=budget, verbose=False)
+        def call_dead_upstream():
+            attempts.append(1)
+            raise ConnectionError("upstream down")
+
+        for _ in range(num_calls):
+            try:
+                call_dead_upstream()
+            except ConnectionError:
+                pass
+        print(
+            f"   {label:>13}: {len(attempts)} upstream attempts "
+            f"for {num_calls} calls ({len(attempts) / num_calls:.2f}x load)"
+        )
+
+
+async def async_retry_example():
+    """Retry a coroutine without blocking the event loop."""
+    outcomes = iter([TimeoutError("slow upstream"), TimeoutError("slow upstream")])
+
+    @retry(max_attempts=4, delay=0.05, retry_on=(TimeoutError, ConnectionError))
+    async def fetch_quote():
+        failure = next(outcomes, None)
+        if failure is not None:
+            raise failure
+        return "Quote: 42.00"
+
+    # A heartbeat keeps ticking while the retry sleeps
+    heartbeat = asyncio.create_task(asyncio.sleep(0.01))
+    print(f"   {await fetch_quote()} (event loop free: {heartbeat.done()})")
+
+
+def benchmark_timer_overhead(iterations=200_000):
+    """Measure per-call cost the histogram timer adds to a no-op function."""
+
+    def noop():
+        return None
+
+    timed_noop = timer(noop, registry=MetricsRegistry())
+
+    results = {}
+    for label, candidate in (("bare", noop), ("timed", timed_noop)):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            candidate()
+        results[label] = (time.perf_counter_ns() - start) / iterations
+
+    overhead = results["timed"] - results["bare"]
+    print(f"   Bare call: {results['bare']:.0f} ns, timed call: {results['timed']:.0f} ns")
+    print(f"   Timer overhead: {overhead:.0f} ns per call (target < 1000 ns)")
+
+
+def benchmark_call_logging(iterations=20_000):
+    """Compare eager, lazy, disabled and sampled debug logging overhead."""
+    payload = "x" * 1_000_000  # A large file payload argument
+
+    def eager_debug(func):
+        def wrapper(*args, **kwargs):
+            args_value = ", ".join(str(arg) for arg in args)
+            kwargs_value = ", ".join(f"{k}={v}" for k, v in kwargs.items())
+            all_args = ", ".join(filter(None, [args_value, kwargs_value]))
+            f"🔍 Calling: {func.__name__}({all_args})"  # Formatted, then discarded
+            result = func(*args, **kwargs)
+            f"🔍 Returned: {result}"
+            return result
+
+        return wrapper
+
+    def store(name, content):
+        return len(content)
+
+    discard = lambda record: str(record)  # Format like print would, skip I/O
+    candidates = [
+        ("eager str() (old)", eager_debug(store)),
+        ("lazy, enabled", debug(store, sink=CallLogSink(writer=discard))),
+        ("lazy, 1-in-100", debug(store, sink=CallLogSink(writer=discard), sample_every=100)),
+        ("disabled", debug(store, sink=CallLogSink(level=logging.WARNING))),
+    ]
+
+    for label, candidate in candidates:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            candidate("upload.bin", payload)
+        per_call = (time.perf_counter_ns() - start) / iterations
+        print(f"   {label:>18}: {per_call:>8.0f} ns per call")
+
+
+def build_transfer_stack(sink, max_calls):
+    """Build the transfer_money decorator stack with its own limiter and sink."""
+
+    @login_required
+    @rate_limit(max_calls=max_calls, time_window=10, key=lambda user, *a, **kw: user["name"])
+    @log_calls(sink=sink)
+    @validate_positive
+    def transfer(user, amount, to_account):
+        """Transfer money between accounts with security and validation."""
+        return f"Transferred ${amount} to account {to_account}"
+
+    return transfer
+
+
+def benchmark_fused_stack(iterations=100_000):
+    """Check fused/nested equivalence, then compare their call latency."""
+    scenarios = [
+        ((regular_user, 100, "12345"), {}),
+        ((guest_user, 100, "12345"), {}),
+        ((regular_user, -50, "12345"), {}),
+        ((), {"user": admin_user, "amount": 10, "to_account": "33333"}),
+        ((regular_user, 25, "11111"), {}),  # Third call for this user: rate limited
+    ]
+    traces = []
+    for make in (lambda f: f, fuse):
+        events = []
+        stack = make(build_transfer_stack(CallLogSink(writer=events.append), 2))
+        results = [stack(*args, **kwargs) for args, kwargs in scenarios]
+        traces.append((results, [(r.event, r.func_name) for r in events]))
+    print(f"   Same results and evaluation order: {traces[0] == traces[1]}")
+
+    quiet = CallLogSink(level=logging.WARNING)
+    nested = build_transfer_stack(quiet, max_calls=10**9)
+    fused = fuse(build_transfer_stack(quiet, max_calls=10**9))
+    print(
+        f"   Fused wrapper keeps metadata: {fused.__name__}, "
+        f"{fused.__doc__ is not None}, limiter={hasattr(fused, 'limiter')}"
+    )
+
+    for label, candidate in (("nested", nested), ("fused", fused)):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            candidate(regular_user, 100, "12345")
+        per_call = (time.perf_counter_ns() - start) / iterations
+        print(f"   {label:>6} stack: {per_call:.0f} ns per call")
+
+
+print("\n6. Retry Budget Under a Failing Dependency:")
+benchmark_retry_budget()
+print("\n7. Async Retry with Backoff:")
+asyncio.run(async_retry_example())
+print("\n8. Call Logging Overhead (1 MB argument):")
+benchmark_call_logging()
+print("\n9. Fused vs Nested transfer_money Stack:")
+benchmark_fused_stack()
+print("\n10. Timer Overhead and Latency Histograms:")
+benchmark_timer_overhead()
+metrics.export()
+
 print("\n" + "=" * 60)
 
 # Implementation Patterns Reference
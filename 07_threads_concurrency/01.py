@@ -4,14 +4,27 @@ Concise, high-value examples of Python threading and concurrency.
 Focus on practical patterns for real applications.
 """
 
+import functools
+import gzip
+import itertools
+import math
+import multiprocessing
+import os
 import threading
 import time
 import queue
 import concurrent.futures
+from collections import deque
 from threading import Lock, RLock, Semaphore, Event
 import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# Benchmarks run at demo size; FULL_BENCHMARKS=1 selects the full-scale
+# runs (a million tasks or items), which take several minutes.
+FULL_BENCHMARKS = os.environ.get("FULL_BENCHMARKS") == "1"
+
 print("Python Threading & Concurrency - Essential Patterns")
 print("=" * 60)
 
@@ -128,37 +141,40 @@ print("-" * 40)
 # Thread-safe queue for producer-consumer
 task_queue = queue.Queue(maxsize=5)
 results_queue = queue.Queue()
+_EOS = object()  # End-of-stream sentinel
 
 
-def producer(name, num_items):
-    """Produce items and put them in queue."""
+def producer(name, num_items, num_consumers=2):
+    """Produce items and put them in queue, then one sentinel per consumer."""
     for i in range(num_items):
         item = f"{name}-Item-{i+1}"
         task_queue.put(item)
         print(f"📦 Producer {name}: Added {item}")
         time.sleep(0.1)
 
+    for _ in range(num_consumers):
+        task_queue.put(_EOS)
     print(f"✅ Producer {name}: Finished")
 
 
 def consumer(name):
-    """Consume items from queue."""
+    """Consume items from queue until the end-of-stream sentinel."""
     while True:
-        try:
-            # Wait for item with timeout
-            item = task_queue.get(timeout=2)
-            print(f"🔧 Consumer {name}: Processing {item}")
+        # Block until there is work; no timeout, so no idle tail at the end
+        item = task_queue.get()
+        if item is _EOS:
+            task_queue.task_done()
+            print(f"🛑 Consumer {name}: End of stream, stopping")
+            break
 
-            # Simulate processing time
-            time.sleep(0.2)
+        print(f"🔧 Consumer {name}: Processing {item}")
 
-            # Mark task as done
-            task_queue.task_done()
-            results_queue.put(f"Processed-{item}")
+        # Simulate processing time
+        time.sleep(0.2)
 
-        except queue.Empty:
-            print(f"🛑 Consumer {name}: No more items, stopping")
-            break
+        # Mark task as done
+        task_queue.task_done()
+        results_queue.put(f"Processed-{item}")
 
 
 print("📋 Producer-Consumer Example:")
@@ -180,6 +196,231 @@ task_queue.join()
 
 print(f"📊 Results collected: {results_queue.qsize()} items")
 
+
+class PipelineStage:
+    """One step of a Pipeline: func applied by `workers` threads.
+
+    func takes one item and returns one item, or with per_batch=True takes
+    a list and returns a list. The stage's input buffer holds at most
+    max_batches batches, so a fast producer blocks (backpressure) instead
+    of filling memory.
+    """
+
+    def __init__(self, func, workers=1, max_batches=8, per_batch=False, name=None):
+        self.func = func
+        self.workers = workers
+        self.per_batch = per_batch
+        self.name = name or getattr(func, "__name__", "stage")
+        self.inbox = queue.Queue(maxsize=max_batches)
+        self.outbox = None  # Next stage's inbox, set by Pipeline
+        self.lock = Lock()
+        self.active = workers  # Workers that haven't seen end-of-stream yet
+
+    def _run(self, pipeline):
+        while True:
+            batch = self.inbox.get()
+            if batch is _EOS:
+                # Let sibling workers see it too; the last one passes it on
+                self.inbox.put(_EOS)
+                with self.lock:
+                    self.active -= 1
+                    last = self.active == 0
+                if last:
+                    self.outbox.put(_EOS)
+                return
+
+            if pipeline.error is not None:
+                continue  # Keep draining so upstream never blocks
+            try:
+                if self.per_batch:
+                    out = self.func(batch)
+                else:
+                    func = self.func
+                    out = [func(item) for item in batch]
+            except Exception as e:
+                pipeline.fail(e)
+                continue
+            if out:
+                self.outbox.put(out)
+
+
+class Pipeline:
+    """Chain of PipelineStages connected by bounded, batched queues.
+
+    Items move between threads batch_size at a time, so queue locking is
+    paid once per batch rather than once per item. End of input is an
+    explicit sentinel, so the pipeline finishes as soon as the last batch
+    is processed. The first exception stops feeding and is re-raised by
+    run() once every thread has exited.
+
+    One run at a time; each run starts from fresh queues, so a pipeline
+    can be run again once the previous run finished or was abandoned.
+    """
+
+    def __init__(self, *stages, batch_size=256, max_batches=8):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.error = None
+        self.running = False
+        self.lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        """Fresh queues and counters, so no state leaks from a previous run."""
+        for stage in self.stages:
+            stage.inbox = queue.Queue(maxsize=stage.inbox.maxsize)
+            stage.active = stage.workers
+        self.output = queue.Queue(maxsize=self.max_batches)
+        for stage, downstream in zip(self.stages, self.stages[1:]):
+            stage.outbox = downstream.inbox
+        self.stages[-1].outbox = self.output
+        self.error = None
+
+    def fail(self, error):
+        with self.lock:
+            if self.error is None:
+                self.error = error
+
+    def _feed(self, items):
+        inbox, size = self.stages[0].inbox, self.batch_size
+        batch = []
+        try:
+            for item in items:
+                if self.error is not None:
+                    break
+                batch.append(item)
+                if len(batch) >= size:
+                    inbox.put(batch)
+                    batch = []
+            if batch and self.error is None:
+                inbox.put(batch)
+        except Exception as e:
+            self.fail(e)
+        inbox.put(_EOS)
+
+    def run(self, items):
+        """Feed items through every stage and yield the results."""
+        with self.lock:
+            if self.running:
+                raise RuntimeError("Pipeline is already running")
+            self.running = True
+        self._reset()
+        threads = [threading.Thread(target=self._feed, args=(items,), daemon=True)]
+        for stage in self.stages:
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(target=stage._run, args=(self,), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        finished = False
+        try:
+            while True:
+                batch = self.output.get()
+                if batch is _EOS:
+                    finished = True
+                    break
+                if self.error is None:
+                    yield from batch
+        finally:
+            if not finished:
+                # Caller stopped early: stop the feed and drain the output
+                # so no stage stays blocked on a full queue
+                self.fail(RuntimeError("Pipeline run abandoned"))
+                while self.output.get() is not _EOS:
+                    pass
+            for thread in threads:
+                thread.join()
+            self.running = False
+
+        if self.error is not None:
+            raise self.error
+
+
+def per_item_pipeline(items, funcs, maxsize=2048):
+    """Reference version: one queue put/get per item per stage."""
+    queues = [queue.Queue(maxsize=maxsize) for _ in range(len(funcs) + 1)]
+
+    def feed():
+        for item in items:
+            queues[0].put(item)
+        queues[0].put(_EOS)
+
+    def stage(func, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is _EOS:
+                outbox.put(_EOS)
+                return
+            outbox.put(func(item))
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for func, inbox, outbox in zip(funcs, queues, queues[1:]):
+        threads.append(threading.Thread(target=stage, args=(func, inbox, outbox), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    while True:
+        item = queues[-1].get()
+        if item is _EOS:
+            break
+        yield item
+    for thread in threads:
+        thread.join()
+
+
+def pipeline_throughput_benchmark(num_items=10_000):
+    """Compare per-item queues with the batched Pipeline."""
+    print(f"\n🚰 Pipeline Throughput ({num_items:,} small items, 2 stages):")
+
+    def double(x):
+        return x * 2
+
+    def increment(x):
+        return x + 1
+
+    expected = sum(x * 2 + 1 for x in range(num_items))
+
+    start_time = time.perf_counter()
+    total = sum(per_item_pipeline(range(num_items), [double, increment]))
+    per_item_time = time.perf_counter() - start_time
+    assert total == expected
+    print(f"   per-item: {num_items / per_item_time:>11,.0f} items/s ({per_item_time:.2f}s)")
+
+    for batch_size in (64, 1024):
+        pipeline = Pipeline(
+            PipelineStage(double),
+            PipelineStage(increment),
+            batch_size=batch_size,
+        )
+        start_time = time.perf_counter()
+        total = sum(pipeline.run(range(num_items)))
+        elapsed = time.perf_counter() - start_time
+        assert total == expected
+        print(
+            f"   batch={batch_size:<5}: {num_items / elapsed:>9,.0f} items/s "
+            f"({elapsed:.2f}s, {per_item_time / elapsed:.1f}x)"
+        )
+
+    # Errors stop the feed and surface in the caller
+    def reject_negative(x):
+        if x < 0:
+            raise ValueError(f"negative item {x}")
+        return x
+
+    try:
+        list(Pipeline(PipelineStage(reject_negative), batch_size=4).run([1, 2, -3, 4]))
+    except ValueError as e:
+        print(f"   Stage error propagated: {e}")
+
+
+if FULL_BENCHMARKS:
+    pipeline_throughput_benchmark(num_items=1_000_000)
+else:
+    pipeline_throughput_benchmark()
+
 # ===== THREAD POOL EXECUTOR =====
 print("\n4. THREAD POOL EXECUTOR")
 print("-" * 40)
@@ -235,9 +476,75 @@ print("-" * 50)
 
 
 # Example 1: Web Scraping with Threading
-def fetch_url_info(url):
-    """Simulate fetching information from URL."""
+class SessionPool:
+    """Thread-safe pooled HTTP layer for worker threads.
+
+    requests.Session isn't guaranteed thread-safe, so each thread gets its
+    own Session, but all of them mount one shared HTTPAdapter. Its urllib3
+    pools keep up to max_workers keep-alive connections per host (blocking
+    when all are busy), so a connection's TCP/TLS handshake is paid once
+    and reused by every thread.
+    """
+
+    def __init__(self, max_workers=3, max_hosts=10, connect_timeout=3.05, read_timeout=10.0):
+        self.adapter = HTTPAdapter(
+            pool_connections=max_hosts, pool_maxsize=max_workers, pool_block=True
+        )
+        self.timeout = (connect_timeout, read_timeout)
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = Lock()
+
+    def session(self):
+        """Return the calling thread's Session, creating it on first use."""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def fetch(self, url, chunk_size=64 * 1024):
+        """GET url and stream the body; return (status, decoded byte count).
+
+        iter_content() decompresses gzip incrementally, so large responses
+        never sit in memory whole.
+        """
+        with self.session().get(url, timeout=self.timeout, stream=True) as response:
+            size = 0
+            for chunk in response.iter_content(chunk_size):
+                size += len(chunk)
+            return response.status_code, size
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def fetch_url_info(url, pool=None):
+    """Fetch information from URL (simulated unless a SessionPool is given)."""
     try:
+        if pool is not None:
+            status_code, content_length = pool.fetch(url)
+            return {
+                "url": url,
+                "status": status_code,
+                "content_length": content_length,
+                "success": status_code < 400,
+            }
+
         print(f"🌐 Fetching {url}...")
         # Simulate HTTP request delay
         time.sleep(1)
@@ -256,9 +563,13 @@ def fetch_url_info(url):
         return {"url": url, "error": str(e), "success": False}
 
 
-def web_scraping_example():
-    """Demonstrate concurrent web scraping."""
-    urls = [
+def web_scraping_example(urls=None, max_workers=3, pooled=False):
+    """Demonstrate concurrent web scraping.
+
+    With pooled=True the URLs are really fetched through a SessionPool
+    sized to max_workers, so no worker waits for a free connection.
+    """
+    urls = urls or [
         "https://example1.com/api/data",
         "https://example2.com/products",
         "https://example3.com/users",
@@ -269,8 +580,13 @@ def web_scraping_example():
     print("🕷️ Web Scraping Example:")
     start_time = time.time()
 
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        results = list(executor.map(fetch_url_info, urls))
+    pool = SessionPool(max_workers=max_workers) if pooled else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(functools.partial(fetch_url_info, pool=pool), urls))
+    finally:
+        if pool is not None:
+            pool.close()
 
     end_time = time.time()
 
@@ -282,13 +598,85 @@ def web_scraping_example():
     print(f"❌ Failed: {len(failed)} URLs")
     print(f"⏱️ Total time: {end_time - start_time:.2f} seconds")
 
-    for result in successful:
+    for result in successful[:5]:
         print(f"   📊 {result['url']}: {result['content_length']} bytes")
 
 
 web_scraping_example()
 
 
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Local HTTP/1.1 keep-alive server that gzips when asked."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+    body = b"<html>" + b"lorem ipsum dolor sit amet " * 200 + b"</html>"
+    gzipped = gzip.compress(body)
+    connections = 0  # Accepted TCP connections
+    connections_lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with _StandInHandler.connections_lock:
+            _StandInHandler.connections += 1
+
+    def do_GET(self):
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        payload = self.gzipped if use_gzip else self.body
+        self.send_response(200)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def session_pool_benchmark(num_requests=1000, max_workers=8):
+    """Compare a new connection per request with the pooled SessionPool."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+    urls = [f"{url}?n={i}" for i in range(num_requests)]
+    print(f"\n🔌 Session Pooling ({num_requests} requests, {max_workers} workers, local server):")
+
+    def per_request(target):
+        with requests.get(target, timeout=(3.05, 10.0)) as response:
+            return len(response.content)
+
+    def run(fetch):
+        before = _StandInHandler.connections
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            sizes = list(executor.map(fetch, urls))
+        elapsed = time.perf_counter() - start_time
+        opened = _StandInHandler.connections - before
+        return elapsed, opened, sizes
+
+    try:
+        elapsed, opened, sizes = run(per_request)
+        print(f"   per-request: {num_requests / elapsed:>6,.0f} req/s, {opened} connections opened")
+
+        with SessionPool(max_workers=max_workers) as pool:
+            elapsed_pooled, opened, pooled = run(
+                lambda target: fetch_url_info(target, pool)["content_length"]
+            )
+        assert pooled == sizes
+        print(
+            f"   pooled:      {num_requests / elapsed_pooled:>6,.0f} req/s, {opened} connections opened "
+            f"({elapsed / elapsed_pooled:.1f}x)"
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+session_pool_benchmark()
+
+
 # Example 2: File Processing with Threading
 def process_file(filename):
     """Simulate file processing."""
@@ -340,30 +728,67 @@ batch_file_processing()
 
 
 # Example 3: API Rate-Limited Requests
+class TokenBucket:
+    """Token-bucket rate limiter shared by threads.
+
+    Each caller reserves the next token under a short lock, then waits
+    outside the lock until that token's time slot. Reservations are handed
+    out in arrival order, so wakeups are FIFO and the rate never overshoots.
+
+    TokenBucket in 08_async_python/01.py is this class plus acquire_async;
+    keep the two in step.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate  # Tokens added per second
+        self.capacity = capacity if capacity is not None else rate  # Burst size
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = Lock()
+
+    def reserve(self, tokens=1):
+        """Reserve tokens and return how many seconds the caller must wait."""
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.updated
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+            self.tokens -= tokens  # Negative balance = queued reservations
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self, tokens=1):
+        """Blocking acquire for threads."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
 class RateLimitedAPI:
     """Simulate API with rate limiting."""
 
     def __init__(self, requests_per_second=2):
-        self.semaphore = Semaphore(requests_per_second)
+        # A Semaphore only caps concurrency; the bucket caps the actual rate
+        self.bucket = TokenBucket(rate=requests_per_second)
         self.request_count = 0
         self.lock = Lock()
 
     def make_request(self, endpoint):
         """Make rate-limited API request."""
-        with self.semaphore:
-            with self.lock:
-                self.request_count += 1
-                request_id = self.request_count
+        self.bucket.acquire()
+        with self.lock:
+            self.request_count += 1
+            request_id = self.request_count
 
-            print(f"🌐 API Request #{request_id} to {endpoint}")
-            time.sleep(0.5)  # Simulate API call
+        print(f"🌐 API Request #{request_id} to {endpoint}")
+        time.sleep(0.5)  # Simulate API call
 
-            return {
-                "request_id": request_id,
-                "endpoint": endpoint,
-                "data": f"Response data from {endpoint}",
-                "timestamp": time.time(),
-            }
+        return {
+            "request_id": request_id,
+            "endpoint": endpoint,
+            "data": f"Response data from {endpoint}",
+            "timestamp": time.time(),
+        }
 
 
 def api_testing_example():
@@ -397,59 +822,510 @@ def api_testing_example():
 api_testing_example()
 
 
+def max_admissions_per_window(timestamps, window=1.0):
+    """Return the most admissions that fell inside any window-long span."""
+    timestamps = sorted(timestamps)
+    best = start = 0
+    for end, stamp in enumerate(timestamps):
+        while stamp - timestamps[start] > window:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def token_bucket_stress_test(num_callers=1000, rate=500, capacity=50):
+    """Confirm the bucket never admits more than capacity + rate per second."""
+    bucket = TokenBucket(rate=rate, capacity=capacity)
+    admitted = []
+    admitted_lock = Lock()
+    ready = threading.Barrier(num_callers + 1)
+
+    def caller():
+        ready.wait()  # Release every caller at once
+        bucket.acquire()
+        with admitted_lock:
+            admitted.append(time.monotonic())
+
+    # One thread per caller, so all of them contend for the bucket together
+    threads = [threading.Thread(target=caller) for _ in range(num_callers)]
+    for thread in threads:
+        thread.start()
+    start_time = time.time()
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start_time
+
+    peak = max_admissions_per_window(admitted)
+    limit = capacity + rate
+    print(f"\n🚦 Token Bucket Stress Test ({num_callers} callers):")
+    print(f"   Peak admissions in any 1s window: {peak} (limit {limit})")
+    print(f"   Limit held: {peak <= limit}, total time: {elapsed:.2f}s")
+
+
+token_bucket_stress_test()
+
+
 # Example 4: Background Task Manager
-class BackgroundTaskManager:
-    """Manage background tasks with threading."""
+def _fork_available():
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _process_context():
+    """Pick a start method for worker processes.
+
+    This script runs its demos at import time and has no __main__ guard,
+    so spawn-based children would re-run every example; fork avoids that
+    where it is available. Elsewhere the platform default is used, which
+    needs an import-safe main module (the demos below skip the process
+    backends in that case).
+    """
+    if _fork_available():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class LatencySamples:
+    """Bounded reservoir of recent latency samples with percentiles."""
+
+    def __init__(self, max_samples=10_000):
+        self.samples = deque(maxlen=max_samples)  # append() is thread-safe
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, percent):
+        """Return the given percentile (0-100) of recent samples in seconds."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+
+_STOP = object()  # Worker stop sentinel
+
+
+class _Task:
+    """One unit of work plus the bookkeeping the manager needs for it."""
+
+    __slots__ = (
+        "func", "args", "task_id", "cpu_bound", "priority",
+        "enqueued_at", "expires_at", "future",
+    )
 
-    def __init__(self):
-        self.tasks = queue.Queue()
+    def __init__(self, func, args, task_id, cpu_bound, priority, expires_at, future):
+        self.func = func
+        self.args = args
+        self.task_id = task_id
+        self.cpu_bound = cpu_bound
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.expires_at = expires_at
+        self.future = future
+
+
+class BackgroundTaskManager:
+    """Manage background tasks with threading.
+
+    executor selects where tasks run: "thread" (worker threads only),
+    "process" (every task goes to a process pool) or "hybrid" (tasks added
+    with cpu_bound=True go to processes, the rest stay on threads).
+    Process tasks must be picklable module-level functions. They still go
+    through the scheduler: a worker hands a task to the pool only once a
+    process is free, so the backlog waits in our queue where priorities,
+    deadlines and cancel_pending apply. The pool's processes are started
+    in the constructor, before any worker thread exists, so fork never
+    copies a process with running threads.
+
+    scheduler selects how workers find work. "shared" uses one priority
+    queue: a task's sort key is its enqueue time plus
+    ``priority * aging_interval``, so a waiting LOW task eventually
+    overtakes newly added HIGH tasks and cannot starve. "stealing" gives
+    every worker its own deque (FIFO, priorities ignored); idle workers
+    steal from the other end of busy workers' deques, so no shared queue
+    lock sits on the hot path.
+
+    Tasks whose deadline passes while queued are dropped or demoted to LOW,
+    depending on expired_policy.
+    """
+
+    HIGH, NORMAL, LOW = 0, 1, 2
+    PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+    def __init__(
+        self,
+        executor="thread",
+        max_processes=None,
+        aging_interval=5.0,
+        expired_policy="drop",
+        scheduler="shared",
+        verbose=True,
+    ):
+        if executor not in ("thread", "process", "hybrid"):
+            raise ValueError(f"Unknown executor backend: {executor}")
+        if expired_policy not in ("drop", "deprioritize"):
+            raise ValueError(f"Unknown expired policy: {expired_policy}")
+        if scheduler not in ("shared", "stealing"):
+            raise ValueError(f"Unknown scheduler: {scheduler}")
+        self.executor = executor
+        self.aging_interval = aging_interval
+        self.expired_policy = expired_policy
+        self.scheduler = scheduler
+        self.verbose = verbose
+        self.tasks = queue.PriorityQueue()
         self.results = queue.Queue()
         self.workers = []
         self.shutdown_event = Event()
+        self.lock = Lock()
+        self.outstanding = 0  # Tasks added but not yet yielded by iter_results
+        self.sequence = itertools.count()  # FIFO tie-breaker within a key
+        self.wait_times = {p: LatencySamples() for p in self.PRIORITY_NAMES}
+        self.run_times = {p: LatencySamples() for p in self.PRIORITY_NAMES}
+        # Work-stealing state: per-worker deques plus an injector deque for
+        # tasks submitted before the workers exist
+        self.deques = []
+        self.wakeups = []
+        self.injector = deque()
+        self.round_robin = itertools.count()
+        self.stopping = False
+        self.process_pool = None
+        self.process_slots = None
+        self.process_futures = set()  # Pool futures still running
+        self.pool_closed = False
+        if executor != "thread":
+            max_processes = max_processes or os.cpu_count() or 1
+            self.process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_processes, mp_context=_process_context()
+            )
+            self.process_slots = threading.BoundedSemaphore(max_processes)
+            # With fork the first submit starts every process; do it while
+            # this is still the only thread the manager has
+            self.process_pool.submit(int).result()
 
     def start_workers(self, num_workers=3):
         """Start worker threads."""
+        if self.scheduler == "stealing":
+            self.deques = [deque() for _ in range(num_workers)]
+            self.wakeups = [Event() for _ in range(num_workers)]
         for i in range(num_workers):
-            worker = threading.Thread(target=self._worker_loop, args=(f"Worker-{i+1}",))
+            if self.scheduler == "stealing":
+                target, args = self._stealing_loop, (i,)
+            else:
+                target, args = self._worker_loop, (f"Worker-{i+1}",)
+            worker = threading.Thread(target=target, args=args)
             worker.daemon = True
             worker.start()
             self.workers.append(worker)
-        print(f"🔧 Started {num_workers} background workers")
+        if self.verbose:
+            print(f"🔧 Started {num_workers} background workers")
+
+    def _runs_in_process(self, cpu_bound):
+        """Decide whether a task goes to the process pool."""
+        return self.executor == "process" or (self.executor == "hybrid" and cpu_bound)
+
+    def _enqueue(self, task):
+        """Hand a task to the active scheduler."""
+        if self.scheduler == "shared":
+            sort_key = task.enqueued_at + task.priority * self.aging_interval
+            self.tasks.put((sort_key, next(self.sequence), task))
+            return
+
+        if not self.deques:
+            self.injector.append(task)
+            return
+        index = next(self.round_robin) % len(self.deques)
+        self.deques[index].append(task)
+        wakeup = self.wakeups[index]
+        if not wakeup.is_set():  # Only pay for set() when the worker is idle
+            wakeup.set()
 
     def _worker_loop(self, worker_name):
-        """Worker thread main loop."""
-        while not self.shutdown_event.is_set():
-            try:
-                task_func, args, task_id = self.tasks.get(timeout=1)
-                print(f"⚙️ {worker_name}: Processing task {task_id}")
+        """Shared-queue worker loop.
+
+        Blocks on the queue with no timeout, so idle workers never wake up;
+        a stop sentinel (sorted after all real work) ends the loop.
+        """
+        while True:
+            _, _, task = self.tasks.get()
+            if task is _STOP:
+                self.tasks.task_done()
+                break
+            self._execute(task, worker_name)
 
-                try:
-                    result = task_func(*args)
-                    self.results.put(("success", task_id, result))
-                except Exception as e:
-                    self.results.put(("error", task_id, str(e)))
+    def _steal(self, index):
+        """Take a task from the injector or the back of another worker's deque."""
+        try:
+            return self.injector.popleft()
+        except IndexError:
+            pass
+        count = len(self.deques)
+        for offset in range(1, count):
+            try:
+                return self.deques[(index + offset) % count].pop()
+            except IndexError:
+                continue
+        return None
 
-                self.tasks.task_done()
+    def _has_work(self):
+        return bool(self.injector) or any(self.deques)
 
-            except queue.Empty:
+    def _stealing_loop(self, index):
+        """Work-stealing worker loop: own deque first, then steal, then sleep."""
+        own, wakeup = self.deques[index], self.wakeups[index]
+        worker_name = f"Worker-{index + 1}"
+        while True:
+            try:
+                task = own.popleft()
+            except IndexError:
+                task = self._steal(index)
+            if task is not None:
+                self._execute(task, worker_name)
                 continue
 
-    def add_task(self, func, args, task_id):
-        """Add task to queue."""
-        self.tasks.put((func, args, task_id))
-        print(f"📋 Added task {task_id} to queue")
+            if self.stopping:
+                break
+            # Clear before re-checking so a concurrent submit can't be missed
+            wakeup.clear()
+            if not self._has_work() and not self.stopping:
+                wakeup.wait()
+
+    def _execute(self, task, worker_name):
+        """Run (or expire, or hand off) one task and report its outcome."""
+        if not self._runs_in_process(task.cpu_bound):
+            self._start(task, worker_name, False)
+            return
+        # Wait for a free process first, so the backlog stays in our queue
+        # instead of piling up in the pool's own FIFO
+        self.process_slots.acquire()
+        if not self._start(task, worker_name, True):
+            self.process_slots.release()
+
+    def _start(self, task, worker_name, in_process):
+        """Expire, run or hand off a task; return True if the pool took it."""
+        now = time.monotonic()
+        future = task.future
+        if task.expires_at is not None and now > task.expires_at:
+            if self.expired_policy == "deprioritize":
+                if future is not None and future.cancelled():
+                    self._task_finished()
+                    return
+                task.priority, task.expires_at = self.LOW, None
+                task.enqueued_at = now
+                self._enqueue(task)
+                self._task_finished()
+            elif future is not None and not future.set_running_or_notify_cancel():
+                self._task_finished()  # Cancelled while queued; leave it alone
+            else:
+                self._complete(task, "expired", None)
+            return False
+
+        if future is not None and not future.set_running_or_notify_cancel():
+            self._task_finished()  # Caller cancelled the future while queued
+            return False
+
+        self.wait_times[task.priority].record(now - task.enqueued_at)
+        if self.verbose:
+            print(f"⚙️ {worker_name}: Processing task {task.task_id}")
+
+        if in_process:
+            # Hand off and keep dispatching; the callback reports back
+            try:
+                pool_future = self.process_pool.submit(task.func, *task.args)
+            except Exception as e:
+                if self.pool_closed:  # shutdown() gave up on this task
+                    self._complete(task, "cancelled", None)
+                else:
+                    self._complete(task, "error", e, now)
+                return False
+            self.process_futures.add(pool_future)
+            pool_future.add_done_callback(
+                functools.partial(self._process_task_done, task, now)
+            )
+            return True
 
-    def get_results(self):
-        """Get completed task results."""
-        results = []
-        while not self.results.empty():
-            results.append(self.results.get())
-        return results
+        try:
+            result = task.func(*task.args)
+        except Exception as e:
+            self._complete(task, "error", e, now)
+        else:
+            self._complete(task, "success", result, now)
+        return False
+
+    def _process_task_done(self, task, started_at, future):
+        """Report a finished process-pool task and free its process."""
+        self.process_futures.discard(future)
+        self.process_slots.release()
+        if future.cancelled():
+            self._complete(task, "cancelled", None)
+            return
+        error = future.exception()
+        if error is None:
+            self._complete(task, "success", future.result(), started_at)
+        else:
+            self._complete(task, "error", error, started_at)
+
+    def _complete(self, task, status, value, started_at=None):
+        """Resolve the task's future, or post to the results queue."""
+        if started_at is not None:
+            self.run_times[task.priority].record(time.monotonic() - started_at)
+
+        future = task.future
+        if future is None:
+            if status == "error":
+                value = str(value)
+            self.results.put((status, task.task_id, value))
+        elif status == "success":
+            future.set_result(value)
+        elif status == "error":
+            future.set_exception(value)
+        elif status == "expired":
+            future.set_exception(TimeoutError(f"Task {task.task_id} expired in queue"))
+        elif not future.cancel():
+            # Already running: its pool work item was cancelled at shutdown
+            future.set_exception(concurrent.futures.CancelledError())
+        self._task_finished()
+
+    def _task_finished(self):
+        if self.scheduler == "shared":
+            self.tasks.task_done()
+
+    def add_task(self, func, args, task_id, cpu_bound=False, priority=NORMAL, deadline=None):
+        """Add task to queue; its outcome goes to the results queue.
+
+        priority is HIGH, NORMAL or LOW; deadline is how many seconds the
+        task may wait in the queue before it expires (None for no limit).
+        """
+        if self.shutdown_event.is_set():
+            raise RuntimeError("Task manager is shut down")
+        expires_at = time.monotonic() + deadline if deadline is not None else None
+        with self.lock:
+            self.outstanding += 1
+        self._enqueue(_Task(func, args, task_id, cpu_bound, priority, expires_at, None))
+        if self.verbose:
+            print(f"📋 Added task {task_id} to queue")
+
+    def submit(self, func, *args, priority=NORMAL, deadline=None, cpu_bound=False, task_id=None):
+        """Schedule func(*args) and return a concurrent.futures.Future for it."""
+        if self.shutdown_event.is_set():
+            raise RuntimeError("Task manager is shut down")
+        expires_at = time.monotonic() + deadline if deadline is not None else None
+        future = concurrent.futures.Future()
+        self._enqueue(_Task(func, args, task_id, cpu_bound, priority, expires_at, future))
+        return future
+
+    def iter_results(self, timeout=None):
+        """Yield (status, task_id, result) as add_task tasks finish.
+
+        Blocks until the next result arrives and stops once every task
+        added so far has reported, so callers never poll results.empty().
+        """
+        while True:
+            with self.lock:
+                if self.outstanding == 0:
+                    return
+            item = self.results.get(timeout=timeout)
+            with self.lock:
+                self.outstanding -= 1
+            yield item
+
+    def cancel_pending(self):
+        """Cancel every task still waiting to run; return how many."""
+        pending, sentinels = [], []
+        if self.scheduler == "shared":
+            while True:
+                try:
+                    entry = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if entry[2] is _STOP:
+                    sentinels.append(entry)
+                    self.tasks.task_done()
+                else:
+                    pending.append(entry[2])
+        else:
+            for tasks in [self.injector] + self.deques:
+                while True:
+                    try:
+                        pending.append(tasks.popleft())
+                    except IndexError:
+                        break
+
+        for task in pending:
+            self._complete(task, "cancelled", None)
+        for sentinel in sentinels:
+            self.tasks.put(sentinel)
+        return len(pending)
+
+    def latency_report(self):
+        """Return p50/p99 queue-wait and run time per priority, in seconds."""
+        return {
+            name: {
+                "wait_p50": self.wait_times[p].percentile(50),
+                "wait_p99": self.wait_times[p].percentile(99),
+                "run_p50": self.run_times[p].percentile(50),
+                "run_p99": self.run_times[p].percentile(99),
+            }
+            for p, name in self.PRIORITY_NAMES.items()
+        }
+
+    def shutdown(self, wait=True, timeout=None, cancel_pending=False):
+        """Shutdown task manager.
 
-    def shutdown(self):
-        """Shutdown task manager."""
+        Queued work is drained first unless cancel_pending is set. With a
+        timeout, whatever is still queued at the deadline is cancelled.
+        Returns True if every worker exited in time. With wait=False the
+        process pool is closed by a background thread once the workers
+        have handed it everything still queued.
+        """
         self.shutdown_event.set()
-        print("🛑 Shutting down task manager...")
+        if self.verbose:
+            print("🛑 Shutting down task manager...")
+        if cancel_pending:
+            self.cancel_pending()
+        if self.scheduler == "shared":
+            for _ in self.workers:
+                self.tasks.put((math.inf, next(self.sequence), _STOP))
+        else:
+            self.stopping = True
+            for wakeup in self.wakeups:
+                wakeup.set()
+
+        drained = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if wait:
+            for worker in self.workers:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                worker.join(remaining)
+                if worker.is_alive():
+                    drained = False
+            if not drained:
+                self.cancel_pending()
+
+        if self.process_pool is not None:
+            if wait:
+                drained = self._close_pool(deadline, drained)
+            else:
+                threading.Thread(target=self._close_pool, args=(deadline, True), daemon=True).start()
+        return drained
+
+    def _close_pool(self, deadline, drained):
+        """Shut the process pool down once the workers stop feeding it."""
+        for worker in self.workers:
+            worker.join(None if deadline is None else max(0, deadline - time.monotonic()))
+            if worker.is_alive():
+                drained = False
+        if not drained:
+            self.cancel_pending()
+        if self.process_futures:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            _, running = concurrent.futures.wait(set(self.process_futures), timeout=remaining)
+            drained = drained and not running
+        # Past the deadline, stop waiting; tasks already running in a
+        # process still report back when they finish
+        self.pool_closed = True
+        self.process_pool.shutdown(wait=drained, cancel_futures=not drained)
+        return drained
 
 
 def background_task_example():
@@ -484,14 +1360,10 @@ def background_task_example():
     for func, args, task_id in tasks:
         task_manager.add_task(func, args, task_id)
 
-    # Wait for tasks to complete
+    # Stream results as each task finishes
     print("⏳ Waiting for tasks to complete...")
-    task_manager.tasks.join()
-
-    # Get results
-    results = task_manager.get_results()
     print(f"📊 Task Results:")
-    for status, task_id, result in results:
+    for status, task_id, result in task_manager.iter_results():
         if status == "success":
             print(f"   ✅ {task_id}: {result}")
         else:
@@ -503,6 +1375,161 @@ def background_task_example():
 
 background_task_example()
 
+
+def cpu_bound_task(n):
+    """Pure-Python CPU work (module level so process pools can pickle it)."""
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    return total
+
+
+def executor_scaling_benchmark(num_tasks=8, num_io_tasks=16, work=1_000_000, io_delay=0.2):
+    """Compare backends on a mix of pure-Python CPU tasks and I/O waits."""
+    cores = os.cpu_count() or 1
+    print(
+        f"\n🧮 Executor Backend Scaling ({num_tasks} CPU + {num_io_tasks} I/O tasks, "
+        f"{cores} cores):"
+    )
+    backends = ["thread"]
+    if _fork_available():
+        backends += ["process", "hybrid"]
+    else:
+        print("   process/hybrid skipped: this script has no __main__ guard, so they need fork")
+
+    timings = {}
+    for backend in backends:
+        manager = BackgroundTaskManager(
+            executor=backend, max_processes=cores, verbose=False
+        )
+        manager.start_workers(cores + num_io_tasks)
+
+        start_time = time.time()
+        for i in range(num_tasks):
+            manager.add_task(cpu_bound_task, (work,), f"cpu-{i+1}", cpu_bound=True)
+        for i in range(num_io_tasks):
+            manager.add_task(time.sleep, (io_delay,), f"io-{i+1}")
+        results = list(manager.iter_results())
+        timings[backend] = time.time() - start_time
+        manager.shutdown()
+        ok = sum(1 for status, _, _ in results if status == "success")
+        print(f"   {backend:>7}: {timings[backend]:.2f}s, {ok}/{num_tasks + num_io_tasks} succeeded")
+
+    if "hybrid" in timings:
+        print(
+            f"   Speedup over threads: process {timings['thread'] / timings['process']:.2f}x, "
+            f"hybrid {timings['thread'] / timings['hybrid']:.2f}x"
+        )
+
+
+executor_scaling_benchmark()
+
+
+def priority_latency_benchmark(num_slow=20, num_urgent=10):
+    """Measure urgent-task queue wait behind a backlog of slow tasks."""
+
+    def slow_report(n):
+        time.sleep(0.02)
+        return f"report-{n}"
+
+    def urgent_email(n):
+        time.sleep(0.002)
+        return f"email-{n}"
+
+    print(f"\n🚨 Priority Scheduling ({num_slow} slow + {num_urgent} urgent tasks):")
+    for label, urgent_priority in (("FIFO", BackgroundTaskManager.NORMAL),
+                                   ("priority", BackgroundTaskManager.HIGH)):
+        manager = BackgroundTaskManager(verbose=False)
+        for i in range(num_slow):
+            manager.add_task(slow_report, (i,), f"report-{i}", priority=manager.NORMAL)
+        for i in range(num_urgent):
+            manager.add_task(urgent_email, (i,), f"email-{i}", priority=urgent_priority)
+        # One queued task with a deadline it cannot meet
+        manager.add_task(slow_report, (99,), "stale-report", deadline=0.05)
+
+        manager.start_workers(2)
+        results = list(manager.iter_results())
+        manager.shutdown()
+
+        report = manager.latency_report()[manager.PRIORITY_NAMES[urgent_priority]]
+        expired = [r for r in results if r[0] == "expired"]
+        print(
+            f"   {label:>8}: urgent wait p50={report['wait_p50'] * 1000:.0f}ms "
+            f"p99={report['wait_p99'] * 1000:.0f}ms, expired tasks dropped: {len(expired)}"
+        )
+
+
+priority_latency_benchmark()
+
+
+def shutdown_and_idle_benchmark(num_workers=8):
+    """Measure idle CPU use, shutdown latency, drain deadline and cancellation."""
+    print(f"\n💤 Idle Workers and Shutdown ({num_workers} workers):")
+
+    manager = BackgroundTaskManager(verbose=False)
+    manager.start_workers(num_workers)
+    cpu_start, wall_start = time.process_time(), time.monotonic()
+    time.sleep(1.0)
+    idle_cpu = time.process_time() - cpu_start
+    print(f"   CPU used while idle for {time.monotonic() - wall_start:.1f}s: {idle_cpu * 1000:.1f}ms")
+
+    start_time = time.monotonic()
+    manager.shutdown()
+    print(f"   Idle shutdown latency: {(time.monotonic() - start_time) * 1000:.1f}ms")
+
+    # A backlog that cannot finish before the drain deadline
+    manager = BackgroundTaskManager(verbose=False)
+    manager.start_workers(2)
+    for i in range(20):
+        manager.add_task(time.sleep, (0.1,), f"sleep-{i}")
+    start_time = time.monotonic()
+    drained = manager.shutdown(timeout=0.25)
+    statuses = [status for status, _, _ in manager.iter_results()]
+    print(
+        f"   Drain with 0.25s deadline: drained={drained}, "
+        f"finished={statuses.count('success')}, cancelled={statuses.count('cancelled')}, "
+        f"took {time.monotonic() - start_time:.2f}s"
+    )
+
+
+shutdown_and_idle_benchmark()
+
+
+def scheduler_throughput_benchmark(num_tasks=10_000, num_workers=4, batch=1_000):
+    """Compare no-op task throughput of the shared queue and work stealing."""
+    print(f"\n🏎️ Scheduler Throughput ({num_tasks:,} no-op tasks, {num_workers} workers):")
+
+    def noop():
+        return None
+
+    for scheduler in ("shared", "stealing"):
+        manager = BackgroundTaskManager(scheduler=scheduler, verbose=False)
+        manager.start_workers(num_workers)
+
+        start_time = time.perf_counter()
+        for _ in range(num_tasks // batch):
+            # Submit in batches so a million futures never live at once
+            futures = [manager.submit(noop) for _ in range(batch)]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start_time
+        manager.shutdown()
+
+        print(f"   {scheduler:>8}: {num_tasks / elapsed:>9,.0f} tasks/s ({elapsed:.2f}s)")
+
+    # Waiting on one specific task
+    manager = BackgroundTaskManager(scheduler="stealing", verbose=False)
+    manager.start_workers(2)
+    report = manager.submit(sum, [1, 2, 3], task_id="sum-report")
+    print(f"   Future for a single task: {report.result(timeout=1)}")
+    manager.shutdown()
+
+
+if FULL_BENCHMARKS:
+    scheduler_throughput_benchmark(num_tasks=1_000_000)
+else:
+    scheduler_throughput_benchmark()
+
 # ===== ADVANCED PATTERNS =====
 print("\n6. ADVANCED THREADING PATTERNS")
 print("-" * 40)